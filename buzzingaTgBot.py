@@ -1,16 +1,27 @@
 import os
+import json
 import time
+import asyncio
 import random
+import heapq
+import itertools
 import logging
+from bisect import insort
 from collections import deque
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
 from dotenv import load_dotenv
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.error import BadRequest
 from telegram.ext import (
     ApplicationBuilder,
     CommandHandler,
     CallbackQueryHandler,
     ContextTypes,
+    ExtBot,
     JobQueue,
+    TypeHandler,
+    ApplicationHandlerStop,
 )
 from labels import (
     LATE_BUZZ_MESSAGES,
@@ -29,6 +40,11 @@ from labels import (
     FIRST_BUZZ_FORMAT,
     BUZZ_FORMAT,
     LEADERBOARD_ENTRY,
+    LEADERBOARD_CHAT_HEADER,
+    LEADERBOARD_GLOBAL_HEADER,
+    LEADERBOARD_BOARD_TITLES,
+    LEADERBOARD_BOARD_ENTRY,
+    LEADERBOARD_EMPTY,
     ERROR_UNPIN,
     ERROR_PIN,
     ERROR_AUTO_RESET,
@@ -67,13 +83,38 @@ logging.getLogger("telegram").setLevel(logging.WARNING)
 BOT_TOKEN = os.environ["BOT_TOKEN"]
 ADMIN_IDS = set(map(int, os.environ["ADMIN_IDS"].split(",")))
 
+# Keep one long-lived pinned buzzer per chat and move it into each new game
+# by editing it, instead of posting and pinning a new one on every /start
+REUSE_PINNED_BUZZER = os.environ.get("REUSE_PINNED_BUZZER", "").lower() in ("1", "true", "yes")
+
+# where PINNED_BUZZER is saved so pins survive restarts
+PINNED_BUZZER_FILE = "pinned_buzzers.json"
+
+# one file per chat holding its score ledger and players, so scores survive
+# restarts
+SCORE_LEDGER_DIR = "score_ledgers"
+
 
 PHOTO_FINISH_THRESHOLD = 1.0  # seconds
-BUZZ_COOLDOWN = 0.3            # seconds
+AUTO_RESET_DELAY = 20          # seconds after the first buzz
+BUZZ_COOLDOWN = 0.3            # seconds; one tap token refills per cooldown
+BUZZ_BURST = 3                 # taps a user may fire back to back
+
+THROTTLE_STRIKES = 10          # shed taps within THROTTLE_WINDOW before throttling
+THROTTLE_WINDOW = 10.0         # seconds
+THROTTLE_DURATION = 30.0       # seconds a throttled user is ignored
+
+POLL_TIMEOUT_FIRST = 1         # seconds; first getUpdates after startup returns quickly
+POLL_TIMEOUT_ACTIVE = 10       # seconds; long-poll timeout while games are running
+POLL_TIMEOUT_IDLE = 50         # seconds; ceiling the timeout backs off to when idle
+POLL_ACTIVE_WINDOW = 120       # seconds without updates before the bot counts as idle
+
+# the only update types the handlers use
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
 # =========================================
 
+# (chat_id, message_id) -> buzzer state; message ids are only unique per chat
 STATE = {}
-STREAKS = {}
 USER_NAMES = {}
 
 # chat_id -> pinned buzzer message_id
@@ -82,12 +123,31 @@ PINNED_BUZZER = {}
 # chat_id -> newest buzzer message_id
 NEWEST_BUZZER = {}
 
-# message_id -> scheduled job for auto-reset
+# (chat_id, message_id) -> scheduled job for auto-reset
 SCHEDULED_RESETS = {}
 
 # chat_id -> {user_id: score}
+# Current totals, kept in step with SCORE_LEDGERS so reads stay O(1)
 SCORES = {}
 
+# chat_id -> append-only score ledger
+# {"snapshot": {user_id: score}, "entries": [entry, ...], "seq": n, "undone": {seq, ...}}
+# entry = (seq, admin_id, user_id, delta, timestamp, undoes_seq or None)
+# Totals are the snapshot plus the entries; compaction folds old entries into
+# the snapshot so recovery (after a restart, from SCORE_LEDGER_DIR) only
+# replays the tail.
+SCORE_LEDGERS = {}
+
+# chat_id -> set of user_ids put on the scoreboard with 0 points; kept apart
+# from the ledger, which only records score changes
+SCORE_PLAYERS = {}
+
+# compact a ledger once its tail grows past this many entries
+LEDGER_SNAPSHOT_EVERY = 50
+
+# newest entries kept out of the snapshot so they can still be undone
+LEDGER_UNDO_DEPTH = 10
+
 # chat_id -> deque of recent change lines (newest last)
 SCORE_CHANGE_LOGS = {}
 
@@ -97,11 +157,71 @@ MAX_CHANGE_LINES = 3
 # chat_id -> last scoreboard message_id (to clear change lines from older messages)
 SCOREBOARD_MESSAGES = {}
 
-SESSION_STATS = {
-    "rounds": 0,
-    "closest": None,
+# chat_id -> {"rounds": n, "closest": seconds or None, "run": (user_id, consecutive wins) or None}
+# Cleared for a chat by its RESET
+SESSION_STATS = {}
+
+# (scope, board) -> {"values": {user_id: value}, "top": [(-value, user_id), ...]}
+# scope is a chat_id or GLOBAL_SCOPE; board is one of LEADERBOARD_BOARDS.
+# "top" is always exactly the best players, sorted, updated incrementally; it
+# holds up to LEADERBOARD_SIZE + LEADERBOARD_RESERVE entries and shrinks as
+# its entries drop below everyone left outside it.
+LEADERBOARDS = {}
+
+GLOBAL_SCOPE = "global"
+
+# fastest-finger count, best consecutive fastest run, points
+LEADERBOARD_BOARDS = ("fastest", "streak", "points")
+
+# entries ranked per leaderboard
+LEADERBOARD_SIZE = 10
+
+# extra entries kept below the cut-off; players dropping out of the top are
+# replaced from here instead of rebuilding the board from all its values
+LEADERBOARD_RESERVE = 20
+
+# entries shown per board by /leaderboard
+LEADERBOARD_SHOWN = 5
+
+# metric name -> {"count": n, "total": seconds, "max": seconds}
+# "<handler>.ack" is the time until the callback was answered,
+# "<handler>.total" the time until the deferred edits finished
+METRICS = {}
+
+# how often the metrics are written to the log
+METRICS_LOG_INTERVAL = 600  # seconds
+
+# user_id -> token bucket shared across rounds and chats
+# {"tokens": float, "updated": t, "strikes": n, "strike_start": t, "throttled_until": t}
+RATE_LIMITS = {}
+
+# how often idle token buckets are dropped
+RATE_LIMIT_SWEEP_INTERVAL = 300  # seconds
+
+# load shed by the admission gate
+ADMISSION_STATS = {
+    "admitted": 0,
+    "shed": 0,
+    "throttled": 0,
+    "throttle_events": 0,
 }
 
+# (chat_id, message_id) -> hash of the last text + markup rendered into that message
+RENDERED = {}
+
+# outcome of every message edit that went through edit_message()
+EDIT_STATS = {
+    "sent": 0,
+    "skipped": 0,
+    "not_modified": 0,
+}
+
+# (chat_id, message_id) -> True if the buzz order changed while a deferred render was in flight
+PENDING_RENDERS = {}
+
+# (chat_id, message_id) -> [asyncio.Lock, holders + waiters]; deferred edits to
+# one message run concurrently, so they take turns to reach Telegram in order
+EDIT_LOCKS = {}
 
 
 def keyboard(locked: bool):
@@ -117,11 +237,8 @@ def keyboard(locked: bool):
 
 def scoreboard_keyboard(chat_id):
     """Create scoreboard with user selection buttons as a vertical list ordered by score desc"""
-    if chat_id not in SCORES:
-        SCORES[chat_id] = {}
-
     # Sort users by score (highest first)
-    items = sorted(SCORES[chat_id].items(), key=lambda kv: kv[1], reverse=True)
+    items = sorted(chat_scores(chat_id).items(), key=lambda kv: kv[1], reverse=True)
     buttons = []
 
     for user_id, score in items:
@@ -139,8 +256,24 @@ def scoreboard_keyboard(chat_id):
         logger.debug(f"No users in scoreboard for chat {chat_id}")
         buttons = [[InlineKeyboardButton("No participants yet", callback_data="noop")]]
 
+    if chat_id in SCORE_LEDGERS and last_undoable(SCORE_LEDGERS[chat_id]) is not None:
+        buttons.append([InlineKeyboardButton("↩️ Undo last change", callback_data="score_undo")])
+
     return InlineKeyboardMarkup(buttons)
 
+def scoreboard_text(chat_id):
+    """Recent change lines (newest first) followed by the ranked scoreboard"""
+    items = sorted(chat_scores(chat_id).items(), key=lambda kv: kv[1], reverse=True)
+    lines = ["🏆 **Scoreboard:**"]
+    for i, (uid, score_val) in enumerate(items, start=1):
+        name = USER_NAMES.get(uid, f"User {uid}")
+        lines.append(f"{i}. {name} ({score_val})")
+
+    change_lines = list(SCORE_CHANGE_LOGS.get(chat_id, []))
+    if change_lines:
+        return "\n".join(change_lines) + "\n\n" + "\n".join(lines)
+    return "\n".join(lines)
+
 def points_keyboard(user_id):
     """Create points adjustment buttons"""
     # Compact grid layout (4 columns x 5 rows), then back button
@@ -180,16 +313,564 @@ def points_keyboard(user_id):
 
     return InlineKeyboardMarkup(buttons)
 
+def new_buzzer_state():
+    """Fresh per-message buzzer state"""
+    return {
+        "buzzes": [],
+        "locked": False,
+        "t0": None,
+        "auto_reset_triggered": False,
+        # the round's fastest player has been counted (by lock or auto-reset)
+        "counted": False,
+    }
+
+def clear_round(data):
+    """Get a buzzer's state ready for its next round"""
+    data["buzzes"].clear()
+    data["locked"] = False
+    data["t0"] = None
+    data["auto_reset_triggered"] = False
+    data["counted"] = False
+
+def evict_buzzer(chat_id, msg_id):
+    """Forget everything kept for a buzzer message that is no longer live"""
+    key = (chat_id, msg_id)
+    STATE.pop(key, None)
+    RENDERED.pop(key, None)
+    old_job = SCHEDULED_RESETS.pop(key, None)
+    if old_job:
+        old_job.schedule_removal()
+
+def buzz_order_lines(buzzes):
+    """Format the buzz order with deltas and photo-finish markers"""
+    lines = []
+    for i, (_, name, d) in enumerate(buzzes):
+        if i == 0:
+            lines.append(FIRST_BUZZ_FORMAT.format(name=name))
+        else:
+            suffix = PHOTO_FINISH if d <= PHOTO_FINISH_THRESHOLD else ""
+            lines.append(BUZZ_FORMAT.format(position=i+1, name=name, delta=d, suffix=suffix))
+    return lines
+
+# -------------------- LEADERBOARDS --------------------
+# Per-chat and global boards keep their top entries, plus a reserve below the
+# cut-off, as a small sorted list, so an update is a binary search into a few
+# dozen entries and rendering doesn't scan all users. A board is rebuilt from
+# its values only when more players than the reserve holds have dropped out
+# of the list, and that is deferred until the board is read.
+
+def leaderboard(scope, board):
+    """Get (or create) a leaderboard"""
+    key = (scope, board)
+    if key not in LEADERBOARDS:
+        LEADERBOARDS[key] = {"values": {}, "top": []}
+    return LEADERBOARDS[key]
+
+def board_set(lb, user_id, value):
+    """Set a user's value and keep the board's top list current"""
+    values = lb["values"]
+    old = values.get(user_id)
+    values[user_id] = value
+    if old == value:
+        return
+
+    top = lb["top"]
+    if old is not None and top and (-old, user_id) <= top[-1]:
+        top.remove((-old, user_id))
+
+    # With players left outside the list, an entry below its last one may be
+    # below some of them too; it stays outside and the list shrinks
+    entry = (-value, user_id)
+    if len(values) == len(top) + 1 or (top and entry < top[-1]):
+        insort(top, entry)
+        if len(top) > LEADERBOARD_SIZE + LEADERBOARD_RESERVE:
+            top.pop()
+
+def board_add(lb, user_id, delta):
+    """Add to a user's value and return the new value"""
+    value = lb["values"].get(user_id, 0) + delta
+    board_set(lb, user_id, value)
+    return value
+
+def board_top(lb, n=LEADERBOARD_SIZE):
+    """Top n (user_id, value) pairs, best first"""
+    values = lb["values"]
+    # The reserve ran out: refill the list from all values
+    if len(lb["top"]) < min(n, len(values)):
+        lb["top"] = heapq.nsmallest(LEADERBOARD_SIZE + LEADERBOARD_RESERVE, ((-v, uid) for uid, v in values.items()))
+    return [(uid, -neg) for neg, uid in lb["top"][:n]]
+
+def session_stats(chat_id):
+    """Get (or create) a chat's session stats"""
+    if chat_id not in SESSION_STATS:
+        SESSION_STATS[chat_id] = {"rounds": 0, "closest": None, "run": None}
+    return SESSION_STATS[chat_id]
+
+def record_fastest(chat_id, user_id):
+    """Count a round won by user_id and return their fastest count in this chat"""
+    stats = session_stats(chat_id)
+    run_user, run = stats["run"] or (None, 0)
+    run = run + 1 if run_user == user_id else 1
+    stats["run"] = (user_id, run)
+
+    count = board_add(leaderboard(chat_id, "fastest"), user_id, 1)
+    board_add(leaderboard(GLOBAL_SCOPE, "fastest"), user_id, 1)
+    for scope in (chat_id, GLOBAL_SCOPE):
+        lb = leaderboard(scope, "streak")
+        if run > lb["values"].get(user_id, 0):
+            board_set(lb, user_id, run)
+    return count
+
+def fastest_count(chat_id, user_id):
+    """How many rounds user_id has been fastest in this chat's session"""
+    lb = LEADERBOARDS.get((chat_id, "fastest"))
+    return lb["values"].get(user_id, 0) if lb else 0
+
+def clear_session(chat_id):
+    """Drop a chat's session stats and session leaderboards"""
+    SESSION_STATS.pop(chat_id, None)
+    LEADERBOARDS.pop((chat_id, "fastest"), None)
+    LEADERBOARDS.pop((chat_id, "streak"), None)
+
+# -------------------- SCORE LEDGER --------------------
+
+def score_ledger(chat_id):
+    """Get (or create) the score ledger for a chat"""
+    if chat_id not in SCORE_LEDGERS:
+        SCORE_LEDGERS[chat_id] = {"snapshot": {}, "entries": [], "seq": 0, "undone": set()}
+    return SCORE_LEDGERS[chat_id]
+
+def replay_ledger(chat_id):
+    """Rebuild a chat's totals from its last snapshot plus the tail"""
+    ledger = score_ledger(chat_id)
+    totals = dict.fromkeys(SCORE_PLAYERS.get(chat_id, ()), 0)
+    totals.update(ledger["snapshot"])
+    for _, _, user_id, delta, _, _ in ledger["entries"]:
+        totals[user_id] = totals.get(user_id, 0) + delta
+    return totals
+
+def chat_scores(chat_id):
+    """Current totals for a chat, recovered from the ledger if not cached"""
+    if chat_id not in SCORES:
+        SCORES[chat_id] = replay_ledger(chat_id)
+    return SCORES[chat_id]
+
+def register_player(chat_id, user_id):
+    """Put a player on the scoreboard with 0 points"""
+    scores = chat_scores(chat_id)
+    if user_id not in scores:
+        scores[user_id] = 0
+        SCORE_PLAYERS.setdefault(chat_id, set()).add(user_id)
+        board_add(leaderboard(chat_id, "points"), user_id, 0)
+        board_add(leaderboard(GLOBAL_SCOPE, "points"), user_id, 0)
+        save_score_ledger(chat_id)
+
+def compact_ledger(ledger):
+    """Fold all but the newest LEDGER_UNDO_DEPTH entries into the snapshot"""
+    cut = len(ledger["entries"]) - LEDGER_UNDO_DEPTH
+    if cut <= 0:
+        return
+    snapshot = ledger["snapshot"]
+    for _, _, user_id, delta, _, _ in ledger["entries"][:cut]:
+        snapshot[user_id] = snapshot.get(user_id, 0) + delta
+    del ledger["entries"][:cut]
+    first_seq = ledger["entries"][0][0] if ledger["entries"] else ledger["seq"] + 1
+    ledger["undone"] = {seq for seq in ledger["undone"] if seq >= first_seq}
+
+def record_score(chat_id, admin_id, user_id, delta, undoes=None):
+    """Append a score change to the ledger and return the player's new total"""
+    ledger = score_ledger(chat_id)
+    scores = chat_scores(chat_id)
+
+    ledger["seq"] += 1
+    ledger["entries"].append((ledger["seq"], admin_id, user_id, delta, time.time(), undoes))
+    if undoes is not None:
+        ledger["undone"].add(undoes)
+    scores[user_id] = scores.get(user_id, 0) + delta
+    board_set(leaderboard(chat_id, "points"), user_id, scores[user_id])
+    board_add(leaderboard(GLOBAL_SCOPE, "points"), user_id, delta)
+
+    if len(ledger["entries"]) > LEDGER_SNAPSHOT_EVERY:
+        compact_ledger(ledger)
+        logger.debug(f"Compacted score ledger for chat {chat_id} at seq {ledger['seq']}")
+    save_score_ledger(chat_id)
+    return scores[user_id]
+
+def score_ledger_path(chat_id):
+    return os.path.join(SCORE_LEDGER_DIR, f"{chat_id}.json")
+
+def save_score_ledger(chat_id):
+    """Write a chat's score ledger and players to disk"""
+    ledger = score_ledger(chat_id)
+    path = score_ledger_path(chat_id)
+    tmp_path = path + ".tmp"
+    try:
+        os.makedirs(SCORE_LEDGER_DIR, exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "players": sorted(SCORE_PLAYERS.get(chat_id, ())),
+                "snapshot": {str(uid): score for uid, score in ledger["snapshot"].items()},
+                "entries": ledger["entries"],
+                "seq": ledger["seq"],
+                "undone": sorted(ledger["undone"]),
+            }, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.error(f"Could not save score ledger to {path}: {e}")
+
+def load_score_ledgers():
+    """Restore score ledgers from disk and replay them into the scores and points boards"""
+    try:
+        names = os.listdir(SCORE_LEDGER_DIR)
+    except FileNotFoundError:
+        return
+
+    restored = 0
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(SCORE_LEDGER_DIR, name)
+        try:
+            chat_id = int(name[:-len(".json")])
+            with open(path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load score ledger from {path}: {e}")
+            continue
+
+        SCORE_LEDGERS[chat_id] = {
+            "snapshot": {int(uid): score for uid, score in saved["snapshot"].items()},
+            "entries": [tuple(entry) for entry in saved["entries"]],
+            "seq": saved["seq"],
+            "undone": set(saved["undone"]),
+        }
+        if saved["players"]:
+            SCORE_PLAYERS[chat_id] = set(saved["players"])
+        SCORES.pop(chat_id, None)
+        for uid, score in chat_scores(chat_id).items():
+            board_set(leaderboard(chat_id, "points"), uid, score)
+            board_add(leaderboard(GLOBAL_SCOPE, "points"), uid, score)
+        restored += 1
+    logger.info(f"Restored {restored} score ledger(s) from {SCORE_LEDGER_DIR}")
+
+def last_undoable(ledger):
+    """Newest entry that is not an undo and has not been undone, or None"""
+    for entry in reversed(ledger["entries"]):
+        seq, _, _, _, _, undoes = entry
+        if undoes is None and seq not in ledger["undone"]:
+            return entry
+    return None
+
+# -------------------- MESSAGE EDITS --------------------
+# Every edit goes through edit_message(), which remembers what was last
+# rendered into each message and skips edits that would not change it, instead
+# of paying a round trip for Telegram's "message is not modified" error.
+
+def render_hash(text, reply_markup=None):
+    """Hash of a message's text and inline keyboard"""
+    return hash((text, reply_markup.to_json() if reply_markup else None))
+
+def remember_render(chat_id, message_id, text, reply_markup=None):
+    """Record the content of a freshly sent message"""
+    RENDERED[(chat_id, message_id)] = render_hash(text, reply_markup)
+
+@asynccontextmanager
+async def message_turn(chat_id, message_id):
+    """Wait for earlier edits of this message to finish, then hold its turn"""
+    key = (chat_id, message_id)
+    entry = EDIT_LOCKS.get(key)
+    if entry is None:
+        entry = EDIT_LOCKS[key] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del EDIT_LOCKS[key]
+
+async def edit_message(bot, chat_id, message_id, text, reply_markup=None, parse_mode=None):
+    """Edit a message, in turn, unless it already shows this text and markup.
+
+    Returns True if an edit was sent.
+    """
+    async with message_turn(chat_id, message_id):
+        return await send_edit(bot, chat_id, message_id, text, reply_markup, parse_mode)
+
+async def send_edit(bot, chat_id, message_id, text, reply_markup=None, parse_mode=None):
+    """edit_message() for a caller that already holds the message's turn"""
+    key = (chat_id, message_id)
+    digest = render_hash(text, reply_markup)
+    if RENDERED.get(key) == digest:
+        EDIT_STATS["skipped"] += 1
+        logger.debug(f"Skipped unchanged edit of message {message_id} in chat {chat_id}")
+        return False
+
+    try:
+        await bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=message_id,
+            text=text,
+            reply_markup=reply_markup,
+            parse_mode=parse_mode,
+        )
+    except BadRequest as e:
+        if "not modified" not in str(e).lower():
+            raise
+        EDIT_STATS["not_modified"] += 1
+    else:
+        EDIT_STATS["sent"] += 1
+
+    RENDERED[key] = digest
+    return True
+
+# -------------------- CLOCK --------------------
+# All game timing (cooldowns, buzz deltas, photo finishes, auto-resets) reads
+# the time from CLOCK and schedules through it. SystemClock is real time on the
+# application's job queue; VirtualClock only moves when advance() is called, so
+# simulations can play complete rounds without waiting for them. Handler
+# latency metrics and polling always use real time.
+
+class SystemClock:
+    """Monotonic time; jobs run on the application's job queue"""
+
+    def now(self):
+        return time.monotonic()
+
+    def call_later(self, context, delay, callback, chat_id=None, data=None):
+        """Run callback(context) after delay seconds; returns a job with schedule_removal()"""
+        return context.job_queue.run_once(callback, delay, chat_id=chat_id, data=data)
+
+class VirtualJob:
+    """A job scheduled on a VirtualClock"""
+
+    def __init__(self, callback, chat_id, data):
+        self.callback = callback
+        self.chat_id = chat_id
+        self.data = data
+        self.removed = False
+
+    def schedule_removal(self):
+        self.removed = True
+
+class VirtualClock:
+    """Time that only moves on advance(); due jobs run in order as it passes them"""
+
+    def __init__(self, start=0.0):
+        self._now = start
+        self._jobs = []  # heap of (due, seq, job, context)
+        self._seq = itertools.count()
+
+    def now(self):
+        return self._now
+
+    def call_later(self, context, delay, callback, chat_id=None, data=None):
+        job = VirtualJob(callback, chat_id, data)
+        job_context = SimpleNamespace(bot=context.bot, job=job, application=getattr(context, "application", None))
+        heapq.heappush(self._jobs, (self._now + delay, next(self._seq), job, job_context))
+        return job
+
+    def pending(self):
+        """Number of jobs that are scheduled and not removed"""
+        return sum(1 for _, _, job, _ in self._jobs if not job.removed)
+
+    async def advance(self, seconds):
+        """Move time forward, running every job that falls due on the way"""
+        target = self._now + seconds
+        while self._jobs and self._jobs[0][0] <= target:
+            due, _, job, job_context = heapq.heappop(self._jobs)
+            self._now = due
+            if not job.removed:
+                await job.callback(job_context)
+        self._now = target
+
+# replaced with a VirtualClock by simulations (see soak.py)
+CLOCK = SystemClock()
+
+# -------------------- HANDLER PHASES --------------------
+# Callback handlers run in two phases: a synchronous admission step that
+# updates state and sends the single callback answer right away (this is what
+# stops the spinner on the player's button), followed by deferred tasks that
+# render and edit messages.
+
+def record_metric(name, seconds):
+    """Add a timing sample to METRICS"""
+    metric = METRICS.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+    metric["count"] += 1
+    metric["total"] += seconds
+    if seconds > metric["max"]:
+        metric["max"] = seconds
+
+async def acknowledge(query, handler, started, text=None, show_alert=False):
+    """Answer a callback query once and record the ack latency"""
+    try:
+        await query.answer(text, show_alert=show_alert)
+    except Exception as e:
+        logger.debug(f"Callback answer failed in {handler}: {e}")
+    record_metric(f"{handler}.ack", time.perf_counter() - started)
+
+def defer(context, update, handler, started, coro):
+    """Run the slow phase of a handler after its callback has been answered"""
+    async def run():
+        try:
+            await coro
+        except Exception as e:
+            logger.error(f"Deferred {handler} work failed: {e}")
+        finally:
+            record_metric(f"{handler}.total", time.perf_counter() - started)
+
+    context.application.create_task(run(), update=update)
+
+async def render_buzz_order(bot, chat_id, msg_id):
+    """Edit the live buzzer until it shows the latest buzz order.
+
+    Buzzes that arrive while an edit is in flight only mark the render dirty,
+    so a burst of buzzes is coalesced into as few edits as possible.
+    """
+    key = (chat_id, msg_id)
+    try:
+        while True:
+            async with message_turn(chat_id, msg_id):
+                PENDING_RENDERS[key] = False
+                # Checked once it's our turn: a lock / reset edit that went
+                # first renders its own text; don't overwrite it
+                data = STATE.get(key)
+                if not data or data["locked"] or not data["buzzes"]:
+                    return
+                await send_edit(
+                    bot,
+                    chat_id,
+                    msg_id,
+                    BUZZ_LIVE_MESSAGE + "\n" + "\n".join(buzz_order_lines(data["buzzes"])),
+                    reply_markup=keyboard(False),
+                    parse_mode="Markdown",
+                )
+            if not PENDING_RENDERS.get(key):
+                return
+    finally:
+        PENDING_RENDERS.pop(key, None)
+
+async def log_metrics(context: ContextTypes.DEFAULT_TYPE):
+    """Periodically log handler latency metrics"""
+    for name, metric in sorted(METRICS.items()):
+        avg_ms = metric["total"] / metric["count"] * 1000
+        logger.info(
+            f"Metric {name}: n={metric['count']} avg={avg_ms:.1f}ms max={metric['max'] * 1000:.1f}ms"
+        )
+    logger.info(
+        f"Edits: sent={EDIT_STATS['sent']} skipped={EDIT_STATS['skipped']} "
+        f"not_modified={EDIT_STATS['not_modified']}"
+    )
+    logger.info(
+        f"Admission: admitted={ADMISSION_STATS['admitted']} shed={ADMISSION_STATS['shed']} "
+        f"throttled={ADMISSION_STATS['throttled']} throttle_events={ADMISSION_STATS['throttle_events']}"
+    )
+
+# -------------------- ADMISSION --------------------
+# Runs in handler group -1, before any other handler. Each non-admin user has a
+# token bucket shared across rounds and chats; BUZZ taps without a token are
+# shed without a network call, and users who keep tapping are throttled for a
+# while. Other updates (chat messages, commands, other buttons) pass through
+# without charging the bucket.
+
+def admit(user_id, now):
+    """Take a token from the user's bucket.
+
+    Returns "admitted", "shed", "throttled" (user is serving a throttle) or
+    "throttle" (this tap just got the user throttled).
+    """
+    bucket = RATE_LIMITS.get(user_id)
+    if bucket is None:
+        bucket = RATE_LIMITS[user_id] = {
+            "tokens": float(BUZZ_BURST),
+            "updated": now,
+            "strikes": 0,
+            "strike_start": now,
+            "throttled_until": 0.0,
+        }
+
+    if now < bucket["throttled_until"]:
+        return "throttled"
+
+    bucket["tokens"] = min(BUZZ_BURST, bucket["tokens"] + (now - bucket["updated"]) / BUZZ_COOLDOWN)
+    bucket["updated"] = now
+
+    if bucket["tokens"] >= 1:
+        bucket["tokens"] -= 1
+        return "admitted"
+
+    if now - bucket["strike_start"] > THROTTLE_WINDOW:
+        bucket["strikes"] = 0
+        bucket["strike_start"] = now
+    bucket["strikes"] += 1
+
+    if bucket["strikes"] >= THROTTLE_STRIKES:
+        bucket["strikes"] = 0
+        bucket["throttled_until"] = now + THROTTLE_DURATION
+        return "throttle"
+    return "shed"
+
+async def admission_gate(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Shed BUZZ taps from users who tap faster than their bucket allows"""
+    query = update.callback_query
+    if query is None or query.data != "buzz":
+        return
+
+    user = update.effective_user
+    if user is None or user.id in ADMIN_IDS:
+        return
+
+    verdict = admit(user.id, CLOCK.now())
+    if verdict == "admitted":
+        ADMISSION_STATS["admitted"] += 1
+        return
+
+    if verdict == "throttle":
+        ADMISSION_STATS["throttle_events"] += 1
+        ADMISSION_STATS["throttled"] += 1
+        logger.warning(f"Throttling user {user.id} for {THROTTLE_DURATION:.0f}s")
+        # One answer so the user knows why nothing happens; later taps stay silent
+        try:
+            await query.answer("🐌 Slow down! Try again in a bit.", show_alert=True)
+        except Exception as e:
+            logger.debug(f"Throttle answer failed for user {user.id}: {e}")
+    elif verdict == "throttled":
+        ADMISSION_STATS["throttled"] += 1
+    else:
+        ADMISSION_STATS["shed"] += 1
+
+    raise ApplicationHandlerStop
+
+async def sweep_rate_limits(context: ContextTypes.DEFAULT_TYPE):
+    """Drop token buckets that have refilled and are not throttled"""
+    now = CLOCK.now()
+    idle = [
+        uid for uid, bucket in RATE_LIMITS.items()
+        if now >= bucket["throttled_until"]
+        and bucket["tokens"] + (now - bucket["updated"]) / BUZZ_COOLDOWN >= BUZZ_BURST
+    ]
+    for uid in idle:
+        del RATE_LIMITS[uid]
+    logger.debug(f"Dropped {len(idle)} idle rate limit buckets, {len(RATE_LIMITS)} left")
+
 # -------------------- AUTO-RESET --------------------
 async def auto_reset_buzzer(context: ContextTypes.DEFAULT_TYPE):
-    """Automatically reset buzzer after 30 seconds"""
+    """Automatically reset buzzer AUTO_RESET_DELAY seconds after the first buzz"""
     job = context.job
     msg_id = job.data
-    data = STATE.get(msg_id)
-    
+    key = (job.chat_id, msg_id)
+    data = STATE.get(key)
+
+    # This job has fired; drop it unless a newer one replaced it
+    if SCHEDULED_RESETS.get(key) is job:
+        del SCHEDULED_RESETS[key]
+
     # Don't auto-reset if no one has buzzed
     if not data or not data["buzzes"] or data.get("auto_reset_triggered"):
         logger.debug(f"Auto-reset skipped for chat {job.chat_id} - no buzzes yet")
+        if msg_id != NEWEST_BUZZER.get(job.chat_id):
+            evict_buzzer(job.chat_id, msg_id)
         return
     
     data["auto_reset_triggered"] = True
@@ -206,12 +887,10 @@ async def auto_reset_buzzer(context: ContextTypes.DEFAULT_TYPE):
                 buzzer_list.append(f"{i}. {name} (+{delta}s)")
             
             # Initialize user in scoreboard if not already present
-            if job.chat_id not in SCORES:
-                SCORES[job.chat_id] = {}
-            if uid not in SCORES[job.chat_id]:
-                SCORES[job.chat_id][uid] = 0
+            register_player(job.chat_id, uid)
         
-        await context.bot.edit_message_text(
+        await edit_message(
+            context.bot,
             chat_id=job.chat_id,
             message_id=msg_id,
             text=AUTO_RESET_MESSAGE,
@@ -242,12 +921,14 @@ async def auto_reset_buzzer(context: ContextTypes.DEFAULT_TYPE):
         # Remember previous scoreboard message (if any) so we can clear it
         prev_score_msg = SCOREBOARD_MESSAGES.get(job.chat_id)
 
+        score_markup = scoreboard_keyboard(job.chat_id)
         sent_msg = await context.bot.send_message(
             chat_id=job.chat_id,
             text=score_text,
-            reply_markup=scoreboard_keyboard(job.chat_id),
+            reply_markup=score_markup,
             parse_mode="Markdown",
         )
+        remember_render(job.chat_id, sent_msg.message_id, score_text, score_markup)
 
         # Track the message id of the scoreboard we just sent
         SCOREBOARD_MESSAGES[job.chat_id] = sent_msg.message_id
@@ -263,13 +944,14 @@ async def auto_reset_buzzer(context: ContextTypes.DEFAULT_TYPE):
         if prev_score_msg and prev_score_msg != sent_msg.message_id:
             try:
                 # Build a fresh scoreboard body (no change lines)
-                items = sorted(SCORES[job.chat_id].items(), key=lambda kv: kv[1], reverse=True)
+                items = sorted(chat_scores(job.chat_id).items(), key=lambda kv: kv[1], reverse=True)
                 lines = ["🏆 **Scoreboard:**"]
                 for i, (uid, score_val) in enumerate(items, start=1):
                     name = USER_NAMES.get(uid, f"User {uid}")
                     lines.append(f"{i}. {name} ({score_val})")
 
-                await context.bot.edit_message_text(
+                await edit_message(
+                    context.bot,
                     chat_id=job.chat_id,
                     message_id=prev_score_msg,
                     text="\n".join(lines),
@@ -278,20 +960,95 @@ async def auto_reset_buzzer(context: ContextTypes.DEFAULT_TYPE):
                 )
             except Exception as e:
                 logger.debug(f"Could not clear previous scoreboard message {prev_score_msg}: {e}")
+            # That scoreboard's round is over
+            RENDERED.pop((job.chat_id, prev_score_msg), None)
         logger.debug(f"Sent scoreboard for chat {job.chat_id}")
         
-        # Update stats
-        SESSION_STATS["rounds"] += 1
-        fastest_id = data["buzzes"][0][0]
-        STREAKS[fastest_id] = STREAKS.get(fastest_id, 0) + 1
-        
-        data["buzzes"].clear()
-        data["locked"] = False
-        data["t0"] = None
-        data["last_buzz"].clear()
-        data["auto_reset_triggered"] = False
+        # Update stats, unless a lock already counted this round
+        if not data["counted"]:
+            session_stats(job.chat_id)["rounds"] += 1
+            record_fastest(job.chat_id, data["buzzes"][0][0])
+
+        clear_round(data)
     except Exception as e:
             logger.error(f"Auto-reset failed for chat {job.chat_id}: {e}")
+
+    # A newer buzzer took over while this round was running
+    if msg_id != NEWEST_BUZZER.get(job.chat_id):
+        evict_buzzer(job.chat_id, msg_id)
+# -------------------- PINNED BUZZER --------------------
+
+def load_pinned_buzzers():
+    """Restore PINNED_BUZZER from disk; pinned buzzers are also the newest"""
+    try:
+        with open(PINNED_BUZZER_FILE) as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not load pinned buzzers from {PINNED_BUZZER_FILE}: {e}")
+        return
+
+    for chat_id, msg_id in saved.items():
+        PINNED_BUZZER[int(chat_id)] = msg_id
+        NEWEST_BUZZER.setdefault(int(chat_id), msg_id)
+    logger.info(f"Restored {len(saved)} pinned buzzer(s) from {PINNED_BUZZER_FILE}")
+
+def save_pinned_buzzers():
+    """Write PINNED_BUZZER to disk"""
+    tmp_path = PINNED_BUZZER_FILE + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({str(chat_id): msg_id for chat_id, msg_id in PINNED_BUZZER.items()}, f)
+        os.replace(tmp_path, PINNED_BUZZER_FILE)
+    except OSError as e:
+        logger.error(f"Could not save pinned buzzers to {PINNED_BUZZER_FILE}: {e}")
+
+def activate_buzzer(chat_id, msg_id):
+    """Make msg_id the chat's newest buzzer with a fresh state.
+
+    The previous newest buzzer is evicted right away if idle, otherwise by its
+    pending auto-reset.
+    """
+    prev_msg_id = NEWEST_BUZZER.get(chat_id)
+    if prev_msg_id != msg_id:
+        prev_data = STATE.get((chat_id, prev_msg_id))
+        if prev_data is not None and not prev_data["buzzes"]:
+            evict_buzzer(chat_id, prev_msg_id)
+    NEWEST_BUZZER[chat_id] = msg_id
+    STATE[(chat_id, msg_id)] = new_buzzer_state()
+
+def is_newest_buzzer(chat_id, msg_id):
+    """Whether msg_id is the chat's newest buzzer.
+
+    A chat with no newest buzzer on record (the bot restarted and the buzzer
+    was never pinned, or pinned_buzzers.json didn't exist yet) adopts msg_id.
+    """
+    return NEWEST_BUZZER.setdefault(chat_id, msg_id) == msg_id
+
+async def reuse_pinned_buzzer(bot, chat_id, msg_id):
+    """Start a new game on the already pinned buzzer. Returns False if it can't be edited."""
+    # Whatever round was running on it ends here, like on RESET
+    evict_buzzer(chat_id, msg_id)
+    activate_buzzer(chat_id, msg_id)
+    try:
+        await edit_message(
+            bot,
+            chat_id=chat_id,
+            message_id=msg_id,
+            text=START_MESSAGE,
+            reply_markup=keyboard(False),
+            parse_mode="Markdown",
+        )
+    except Exception as e:
+        # Deleted or otherwise gone; fall back to a new pinned message
+        logger.info(f"Could not reuse pinned buzzer {msg_id} in chat {chat_id}: {e}")
+        evict_buzzer(chat_id, msg_id)
+        return False
+
+    logger.debug(f"Reused pinned buzzer {msg_id} in chat {chat_id}")
+    return True
+
 # -------------------- START / BUZZ --------------------
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
@@ -302,417 +1059,455 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     logger.info(f"Starting new buzzer in chat {chat_id} by user {update.effective_user.full_name}")
 
-    # Unpin previous buzzer if it exists
     old_msg_id = PINNED_BUZZER.get(chat_id)
-    if old_msg_id:
-        try:
-            await context.bot.unpin_chat_message(chat_id, old_msg_id)
-            logger.debug(f"Unpinned previous message {old_msg_id} in chat {chat_id}")
-        except Exception as e:
-            logger.error(f"Unpin failed in chat {chat_id}: {e}")
 
+    # Move the pinned buzzer into the new game instead of posting a new one
+    if REUSE_PINNED_BUZZER and old_msg_id:
+        if await reuse_pinned_buzzer(context.bot, chat_id, old_msg_id):
+            return
+
+    start_markup = keyboard(False)
     msg = await update.message.reply_text(
         START_MESSAGE,
-        reply_markup=keyboard(False),
+        reply_markup=start_markup,
         parse_mode="Markdown",
     )
+    remember_render(chat_id, msg.message_id, START_MESSAGE, start_markup)
 
-    # Track newest buzzer for this chat
-    NEWEST_BUZZER[chat_id] = msg.message_id
+    activate_buzzer(chat_id, msg.message_id)
 
-    # Always pin the new buzzer
-    try:
+    # Pin the new buzzer and unpin the previous one concurrently
+    async def pin_new():
         await context.bot.pin_chat_message(
             chat_id,
             msg.message_id,
             disable_notification=True,
         )
+
+    async def unpin_old():
+        await context.bot.unpin_chat_message(chat_id, old_msg_id)
+
+    calls = [pin_new(), unpin_old()] if old_msg_id and old_msg_id != msg.message_id else [pin_new()]
+    pinned, *unpinned = await asyncio.gather(*calls, return_exceptions=True)
+
+    unpin_ok = bool(unpinned) and not isinstance(unpinned[0], Exception)
+    if unpinned and not unpin_ok:
+        logger.error(f"Unpin failed in chat {chat_id}: {unpinned[0]}")
+    elif unpin_ok:
+        logger.debug(f"Unpinned previous message {old_msg_id} in chat {chat_id}")
+
+    if isinstance(pinned, Exception):
+        logger.error(f"Pin failed in chat {chat_id}: {pinned}")
+        if unpin_ok:
+            PINNED_BUZZER.pop(chat_id, None)
+            save_pinned_buzzers()
+    else:
         PINNED_BUZZER[chat_id] = msg.message_id
+        save_pinned_buzzers()
         logger.debug(f"Pinned buzzer message {msg.message_id} in chat {chat_id}")
-    except Exception as e:
-        logger.error(f"Pin failed in chat {chat_id}: {e}")
 
-    STATE[msg.message_id] = {
-        "buzzes": [],
-        "locked": False,
-        "t0": None,
-        "last_buzz": {},
-        "auto_reset_triggered": False,
-    }
     logger.debug(f"Buzzer initialized in chat {chat_id}")
 
 # -------------------- BUZZ BUTTON --------------------
 async def buzz(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    started = time.perf_counter()
     query = update.callback_query
     msg_id = query.message.message_id
-    data = STATE.get(msg_id)
+    chat_id = query.message.chat_id
+    key = (chat_id, msg_id)
+    data = STATE.get(key)
     user = query.from_user
 
-    # Initialize state for old buzzers (after bot restart)
+    # Superseded buzzers were evicted when a newer one was posted; don't bring
+    # them back, they'd never be auto-reset or evicted again
+    if not data and not is_newest_buzzer(chat_id, msg_id):
+        logger.info(f"Buzz on expired buzzer {msg_id} in chat {chat_id}")
+        await acknowledge(query, "buzz", started, "⚠️ This buzzer has expired. Start a new one!", show_alert=True)
+        return
+
+    # Initialize state for the newest buzzer (after bot restart)
     if not data:
-        logger.info(f"Reinitializing state for old/expired buzzer {msg_id} (likely after bot restart)")
-        STATE[msg_id] = {
-            "buzzes": [],
-            "locked": False,
-            "t0": None,
-            "last_buzz": {},
-            "auto_reset_triggered": False,
-        }
-        data = STATE[msg_id]
+        logger.info(f"Reinitializing state for buzzer {msg_id} (likely after bot restart)")
+        STATE[key] = new_buzzer_state()
+        data = STATE[key]
 
     if data["locked"]:
         logger.info(f"Late buzz from {user.full_name} (ID: {user.id}) - buzzer locked")
-        await query.answer(random.choice(LATE_BUZZ_MESSAGES), show_alert=False)
+        await acknowledge(query, "buzz", started, random.choice(LATE_BUZZ_MESSAGES))
         return
 
     USER_NAMES[user.id] = user.full_name
 
-    now = time.monotonic()
-    last = data["last_buzz"].get(user.id)
-
-    if last and (now - last) < BUZZ_COOLDOWN:
-        logger.debug(f"Cooldown violation from {user.full_name} (ID: {user.id})")
-        await query.answer()
-        return
-
-    data["last_buzz"][user.id] = now
+    now = CLOCK.now()
 
     if any(uid == user.id for uid, _, _ in data["buzzes"]):
         logger.debug(f"Duplicate buzz attempt from {user.full_name} (ID: {user.id})")
-        await query.answer()
+        await acknowledge(query, "buzz", started)
         return
 
-    is_first = not data["buzzes"]
-
-    if is_first:
+    answer_text = None
+    if not data["buzzes"]:
         data["t0"] = now
         delta = 0.0
         logger.info(f"✨ First buzz: {user.full_name} (ID: {user.id})")
-        # Schedule auto-reset after first buzz (20 seconds) - but only for newest buzzer
-        if msg_id == NEWEST_BUZZER.get(query.message.chat_id):
-            job = context.job_queue.run_once(
+        # Schedule auto-reset after first buzz - but only for newest buzzer
+        if msg_id == NEWEST_BUZZER.get(chat_id):
+            job = CLOCK.call_later(
+                context,
+                AUTO_RESET_DELAY,
                 auto_reset_buzzer,
-                20,
-                chat_id=query.message.chat_id,
+                chat_id=chat_id,
                 data=msg_id,
             )
-            SCHEDULED_RESETS[msg_id] = job
-            logger.debug(f"Scheduled auto-reset for message {msg_id} in chat {query.message.chat_id}")
+            SCHEDULED_RESETS[key] = job
+            logger.debug(f"Scheduled auto-reset for message {msg_id} in chat {chat_id}")
         else:
-            logger.debug(f"Skipping auto-reset for old buzzer {msg_id} in chat {query.message.chat_id}")
-        await query.answer(FASTEST_FINGER_MESSAGE, show_alert=False)
+            logger.debug(f"Skipping auto-reset for old buzzer {msg_id} in chat {chat_id}")
+        answer_text = FASTEST_FINGER_MESSAGE
     else:
         delta = round(now - data["t0"], 3)
         if delta > 0:
-            if SESSION_STATS["closest"] is None or delta < SESSION_STATS["closest"]:
-                SESSION_STATS["closest"] = delta
-        await query.answer()
+            stats = session_stats(chat_id)
+            if stats["closest"] is None or delta < stats["closest"]:
+                stats["closest"] = delta
 
     data["buzzes"].append((user.id, user.full_name, delta))
     logger.info(f"Buzz #{len(data['buzzes'])} from {user.full_name} (ID: {user.id}) - Delta: {delta}s")
 
-    lines = []
-    for i, (_, name, d) in enumerate(data["buzzes"]):
-        if i == 0:
-            lines.append(FIRST_BUZZ_FORMAT.format(name=name))
-        else:
-            suffix = PHOTO_FINISH if d <= PHOTO_FINISH_THRESHOLD else ""
-            lines.append(BUZZ_FORMAT.format(position=i+1, name=name, delta=d, suffix=suffix))
+    await acknowledge(query, "buzz", started, answer_text)
 
-    await query.message.edit_text(
-        BUZZ_LIVE_MESSAGE + "\n" + "\n".join(lines),
-        reply_markup=keyboard(False),
-        parse_mode="Markdown",
-    )
+    # A render is already in flight: it will pick up this buzz
+    if key in PENDING_RENDERS:
+        PENDING_RENDERS[key] = True
+        record_metric("buzz.total", time.perf_counter() - started)
+        return
+
+    PENDING_RENDERS[key] = False
+    defer(context, update, "buzz", started, render_buzz_order(context.bot, chat_id, msg_id))
 
 # -------------------- LOCK --------------------
 async def lock(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    started = time.perf_counter()
     query = update.callback_query
     user_id = query.from_user.id
 
     if user_id not in ADMIN_IDS:
         logger.warning(f"Unauthorized lock attempt by user {user_id}")
-        await query.answer("⚠️ Only admins can lock the buzzer!", show_alert=True)
+        await acknowledge(query, "lock", started, "⚠️ Only admins can lock the buzzer!", show_alert=True)
         return
 
-    await query.answer()
-
     msg_id = query.message.message_id
-    data = STATE.get(msg_id)
+    data = STATE.get((query.message.chat_id, msg_id))
     if not data:
         logger.warning(f"Lock attempt on non-existent buzzer {msg_id} (likely expired)")
-        await query.answer("⚠️ This buzzer has expired. Start a new one!", show_alert=True)
+        await acknowledge(query, "lock", started, "⚠️ This buzzer has expired. Start a new one!", show_alert=True)
         return
 
+    chat_id = query.message.chat_id
+
+    # Repeated taps on a locked buzzer re-render the same text (and the edit is
+    # skipped) instead of counting the round again
+    first_lock = not data["locked"]
     data["locked"] = True
-    SESSION_STATS["rounds"] += 1
-    logger.info(f"Buzzer locked in chat {query.message.chat_id}. Buzzes: {len(data['buzzes'])}")
+    if first_lock:
+        session_stats(chat_id)["rounds"] += 1
+        logger.info(f"Buzzer locked in chat {chat_id}. Buzzes: {len(data['buzzes'])}")
 
+    answer_text = None
     fastest_text = ""
     if data["buzzes"]:
         fastest_id, fastest_name, _ = data["buzzes"][0]
-        STREAKS[fastest_id] = STREAKS.get(fastest_id, 0) + 1
-        logger.info(f"🏆 Fastest: {fastest_name} (ID: {fastest_id}) - Streak: {STREAKS[fastest_id]}")
+        if not data["counted"]:
+            data["counted"] = True
+            count = record_fastest(chat_id, fastest_id)
+            logger.info(f"🏆 Fastest: {fastest_name} (ID: {fastest_id}) - Streak: {count}")
+            answer_text = MILESTONE_POPUP.get(count)
 
-        fastest_text = "\n\n" + FASTEST_FORMAT.format(name=fastest_name, streak=STREAKS[fastest_id])
+        fastest_text = "\n\n" + FASTEST_FORMAT.format(name=fastest_name, streak=fastest_count(chat_id, fastest_id))
 
-        if STREAKS[fastest_id] in MILESTONE_POPUP:
-            await query.answer(MILESTONE_POPUP[STREAKS[fastest_id]], show_alert=False)
+    text = LOCKED_MESSAGE + "\n" + "\n".join(buzz_order_lines(data["buzzes"])) + fastest_text
 
-    lines = []
-    for i, (_, name, d) in enumerate(data["buzzes"]):
-        if i == 0:
-            lines.append(FIRST_BUZZ_FORMAT.format(name=name))
-        else:
-            suffix = PHOTO_FINISH if d <= PHOTO_FINISH_THRESHOLD else ""
-            lines.append(BUZZ_FORMAT.format(position=i+1, name=name, delta=d, suffix=suffix))
+    await acknowledge(query, "lock", started, answer_text)
 
-    await query.message.edit_text(
-        LOCKED_MESSAGE + "\n" + "\n".join(lines) + fastest_text,
+    defer(context, update, "lock", started, edit_message(
+        context.bot,
+        chat_id=query.message.chat_id,
+        message_id=msg_id,
+        text=text,
         reply_markup=keyboard(True),
         parse_mode="Markdown",
-    )
+    ))
 
 # -------------------- UNLOCK --------------------
 async def unlock(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    started = time.perf_counter()
     query = update.callback_query
     user_id = query.from_user.id
 
     if user_id not in ADMIN_IDS:
         logger.warning(f"Unauthorized unlock attempt by user {user_id}")
-        await query.answer("⚠️ Only admins can unlock the buzzer!", show_alert=True)
+        await acknowledge(query, "unlock", started, "⚠️ Only admins can unlock the buzzer!", show_alert=True)
         return
 
-    await query.answer()
-
     msg_id = query.message.message_id
-    data = STATE.get(msg_id)
+    data = STATE.get((query.message.chat_id, msg_id))
     if not data:
         logger.warning(f"Unlock attempt on non-existent buzzer {msg_id} (likely expired)")
-        await query.answer("⚠️ This buzzer has expired. Start a new one!", show_alert=True)
+        await acknowledge(query, "unlock", started, "⚠️ This buzzer has expired. Start a new one!", show_alert=True)
         return
 
-    data["buzzes"].clear()
-    data["locked"] = False
-    data["t0"] = None
-    data["last_buzz"].clear()
-    data["auto_reset_triggered"] = False
+    clear_round(data)
     logger.info(f"Buzzer unlocked in chat {query.message.chat_id}")
     
     # Cancel existing auto-reset job
-    old_job = SCHEDULED_RESETS.pop(msg_id, None)
+    old_job = SCHEDULED_RESETS.pop((query.message.chat_id, msg_id), None)
     if old_job:
         old_job.schedule_removal()
         logger.debug(f"Cancelled existing auto-reset job for message {msg_id}")
 
-    await query.message.edit_text(
-        UNLOCK_MESSAGE.format(banter=random.choice(UNLOCK_BANTER)),
+    await acknowledge(query, "unlock", started)
+
+    defer(context, update, "unlock", started, edit_message(
+        context.bot,
+        chat_id=query.message.chat_id,
+        message_id=msg_id,
+        text=UNLOCK_MESSAGE.format(banter=random.choice(UNLOCK_BANTER)),
         reply_markup=keyboard(False),
         parse_mode="Markdown",
-    )
+    ))
 
 # -------------------- RESET --------------------
 async def reset(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    started = time.perf_counter()
     query = update.callback_query
     user_id = query.from_user.id
 
     if user_id not in ADMIN_IDS:
         logger.warning(f"Unauthorized reset attempt by user {user_id}")
-        await query.answer("⚠️ Only admins can reset the game!", show_alert=True)
+        await acknowledge(query, "reset", started, "⚠️ Only admins can reset the game!", show_alert=True)
         return
 
-    await query.answer()
+    chat_id = query.message.chat_id
+    msg_id = query.message.message_id
+    if not is_newest_buzzer(chat_id, msg_id):
+        logger.warning(f"Reset attempt on expired buzzer {msg_id} in chat {chat_id}")
+        await acknowledge(query, "reset", started, "⚠️ This buzzer has expired. Start a new one!", show_alert=True)
+        return
 
-    leaderboard = sorted(
-        STREAKS.items(),
-        key=lambda x: x[1],
-        reverse=True
-    )[:3]
+    top = board_top(leaderboard(chat_id, "fastest"), 3)
 
     lines = [LEADERBOARD_HEADER]
-    for i, (uid, count) in enumerate(leaderboard, start=1):
+    for i, (uid, count) in enumerate(top, start=1):
         name = USER_NAMES.get(uid, "Unknown")
         lines.append(LEADERBOARD_ENTRY.format(position=i, name=name, count=count))
 
-    SESSION_STATS["rounds"] = 0
-    SESSION_STATS["closest"] = None
-    STREAKS.clear()
-    logger.info(f"Game reset in chat {query.message.chat_id}. Leaderboard entries: {len(leaderboard)}")
+    # Only this chat's session; other chats and the global boards are untouched
+    clear_session(chat_id)
+    logger.info(f"Game reset in chat {chat_id}. Leaderboard entries: {len(top)}")
     logger.debug(f"Leaderboard: {lines}")
 
-    msg_id = query.message.message_id
-    
     # Cancel existing auto-reset job if any
-    old_job = SCHEDULED_RESETS.pop(msg_id, None)
+    key = (chat_id, msg_id)
+    old_job = SCHEDULED_RESETS.pop(key, None)
     if old_job:
         old_job.schedule_removal()
     
-    STATE[msg_id] = {
-        "buzzes": [],
-        "locked": False,
-        "t0": None,
-        "last_buzz": {},
-        "auto_reset_triggered": False,
-    }
+    STATE[key] = new_buzzer_state()
+
+    await acknowledge(query, "reset", started)
 
-    await query.message.edit_text(
-        RESET_MESSAGE.format(leaderboard="\n".join(lines)),
+    defer(context, update, "reset", started, edit_message(
+        context.bot,
+        chat_id=query.message.chat_id,
+        message_id=msg_id,
+        text=RESET_MESSAGE.format(leaderboard="\n".join(lines)),
         reply_markup=keyboard(False),
         parse_mode="Markdown",
-    )
+    ))
 
 # -------------------- SCOREBOARD HANDLERS --------------------
 async def score_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle user selection in scoreboard"""
+    started = time.perf_counter()
     query = update.callback_query
     admin_id = query.from_user.id
     
     if admin_id not in ADMIN_IDS:
         logger.warning(f"Unauthorized scoreboard access attempt by user {admin_id}")
-        await query.answer("⚠️ Only admins can modify scores!", show_alert=True)
+        await acknowledge(query, "score_user", started, "⚠️ Only admins can modify scores!", show_alert=True)
         return
     
-    await query.answer()
-    
     try:
         # Extract user_id from callback data
         user_id = int(query.data.split("_")[-1])
-        user_name = USER_NAMES.get(user_id, f"User {user_id}")
-        
-        await query.edit_message_text(
-            f"Select points for {user_name}:",
-            reply_markup=points_keyboard(user_id),
-        )
-        logger.debug(f"Opened points menu for user {user_id} by admin {admin_id}")
     except Exception as e:
         logger.error(f"Error in score_user handler: {e}")
-        await query.answer("Error opening points menu", show_alert=True)
+        await acknowledge(query, "score_user", started, "Error opening points menu", show_alert=True)
+        return
+
+    user_name = USER_NAMES.get(user_id, f"User {user_id}")
+
+    await acknowledge(query, "score_user", started)
+
+    defer(context, update, "score_user", started, edit_message(
+        context.bot,
+        chat_id=query.message.chat_id,
+        message_id=query.message.message_id,
+        text=f"Select points for {user_name}:",
+        reply_markup=points_keyboard(user_id),
+    ))
+    logger.debug(f"Opened points menu for user {user_id} by admin {admin_id}")
 
 async def score_points(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle point adjustment"""
+    started = time.perf_counter()
     query = update.callback_query
     admin_id = query.from_user.id
     
     if admin_id not in ADMIN_IDS:
         logger.warning(f"Unauthorized score update attempt by user {admin_id}")
-        await query.answer("⚠️ Only admins can modify scores!", show_alert=True)
+        await acknowledge(query, "score_points", started, "⚠️ Only admins can modify scores!", show_alert=True)
         return
     
-    await query.answer()
-    
     try:
         # Extract user_id and points from callback data
         # Format: score_points_{user_id}_{points}
         parts = query.data.split("_")
         user_id = int(parts[2])
         points = int(parts[3])
-        
-        chat_id = query.message.chat_id
-        
-        # Initialize if needed
-        if chat_id not in SCORES:
-            SCORES[chat_id] = {}
-        if user_id not in SCORES[chat_id]:
-            SCORES[chat_id][user_id] = 0
-        
-        # Update score
-        SCORES[chat_id][user_id] += points
-        new_score = SCORES[chat_id][user_id]
-        user_name = USER_NAMES.get(user_id, f"User {user_id}")
-        
-        logger.info(f"Updated score for {user_name}: {new_score} (changed by {points:+d}) by admin {admin_id}")
+    except Exception as e:
+        logger.error(f"Error in score_points handler: {e}")
+        await acknowledge(query, "score_points", started, f"Error updating score: {e}", show_alert=True)
+        return
 
-        # Prepare compact change line: "Name +/-points" (e.g. "Spidy -600")
-        change_line = f"{user_name} {points:+d}"
+    chat_id = query.message.chat_id
 
-        # Ensure change log exists and append this change (newest first)
-        if chat_id not in SCORE_CHANGE_LOGS:
-            SCORE_CHANGE_LOGS[chat_id] = deque(maxlen=MAX_CHANGE_LINES)
-        SCORE_CHANGE_LOGS[chat_id].appendleft(change_line)
+    # Update score
+    new_score = record_score(chat_id, admin_id, user_id, points)
+    user_name = USER_NAMES.get(user_id, f"User {user_id}")
 
-        # Build ordered scoreboard text
-        items = sorted(SCORES[chat_id].items(), key=lambda kv: kv[1], reverse=True)
-        lines = ["🏆 **Scoreboard:**"]
-        for i, (uid, score_val) in enumerate(items, start=1):
-            name = USER_NAMES.get(uid, f"User {uid}")
-            lines.append(f"{i}. {name} ({score_val})")
+    logger.info(f"Updated score for {user_name}: {new_score} (changed by {points:+d}) by admin {admin_id}")
 
-        # Combine recent change lines (newest first) with the scoreboard
-        change_lines = list(SCORE_CHANGE_LOGS.get(chat_id, []))
-        if change_lines:
-            message_text = "\n".join(change_lines) + "\n\n" + "\n".join(lines)
-        else:
-            message_text = "\n".join(lines)
+    # Prepare compact change line: "Name +/-points" (e.g. "Spidy -600")
+    change_line = f"{user_name} {points:+d}"
 
-        # Update the scoreboard message with change history and keyboard
-        await query.edit_message_text(
-            message_text,
-            reply_markup=scoreboard_keyboard(chat_id),
-            parse_mode="Markdown",
-        )
+    # Ensure change log exists and append this change (newest first)
+    if chat_id not in SCORE_CHANGE_LOGS:
+        SCORE_CHANGE_LOGS[chat_id] = deque(maxlen=MAX_CHANGE_LINES)
+    SCORE_CHANGE_LOGS[chat_id].appendleft(change_line)
 
-        # Track this message as the latest scoreboard for the chat
-        try:
-            SCOREBOARD_MESSAGES[chat_id] = query.message.message_id
-        except Exception:
-            SCOREBOARD_MESSAGES[chat_id] = None
-    except Exception as e:
-        logger.error(f"Error in score_points handler: {e}")
-        await query.answer(f"Error updating score: {e}", show_alert=True)
+    # Combine recent change lines (newest first) with the ordered scoreboard
+    message_text = scoreboard_text(chat_id)
+
+    # Track this message as the latest scoreboard for the chat
+    SCOREBOARD_MESSAGES[chat_id] = query.message.message_id
+
+    await acknowledge(query, "score_points", started)
+
+    # Update the scoreboard message with change history and keyboard
+    defer(context, update, "score_points", started, edit_message(
+        context.bot,
+        chat_id=chat_id,
+        message_id=query.message.message_id,
+        text=message_text,
+        reply_markup=scoreboard_keyboard(chat_id),
+        parse_mode="Markdown",
+    ))
+
+async def score_undo(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Undo the newest score change by appending its inverse to the ledger"""
+    started = time.perf_counter()
+    query = update.callback_query
+    admin_id = query.from_user.id
+
+    if admin_id not in ADMIN_IDS:
+        logger.warning(f"Unauthorized score undo attempt by user {admin_id}")
+        await acknowledge(query, "score_undo", started, "⚠️ Only admins can modify scores!", show_alert=True)
+        return
+
+    chat_id = query.message.chat_id
+    entry = last_undoable(score_ledger(chat_id))
+    if entry is None:
+        await acknowledge(query, "score_undo", started, "Nothing to undo", show_alert=False)
+        return
+
+    seq, _, user_id, points, _, _ = entry
+    new_score = record_score(chat_id, admin_id, user_id, -points, undoes=seq)
+    user_name = USER_NAMES.get(user_id, f"User {user_id}")
+
+    logger.info(f"Undid score change #{seq} for {user_name}: {new_score} (changed by {-points:+d}) by admin {admin_id}")
+
+    if chat_id not in SCORE_CHANGE_LOGS:
+        SCORE_CHANGE_LOGS[chat_id] = deque(maxlen=MAX_CHANGE_LINES)
+    SCORE_CHANGE_LOGS[chat_id].appendleft(f"↩️ {user_name} {-points:+d}")
+
+    message_text = scoreboard_text(chat_id)
+
+    # Track this message as the latest scoreboard for the chat
+    SCOREBOARD_MESSAGES[chat_id] = query.message.message_id
+
+    await acknowledge(query, "score_undo", started, f"↩️ Undid {user_name} {points:+d}")
+
+    defer(context, update, "score_undo", started, edit_message(
+        context.bot,
+        chat_id=chat_id,
+        message_id=query.message.message_id,
+        text=message_text,
+        reply_markup=scoreboard_keyboard(chat_id),
+        parse_mode="Markdown",
+    ))
 
 async def score_back(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle back button to return to scoreboard"""
+    started = time.perf_counter()
     query = update.callback_query
     admin_id = query.from_user.id
     
     if admin_id not in ADMIN_IDS:
         logger.warning(f"Unauthorized scoreboard access attempt by user {admin_id}")
-        await query.answer("⚠️ Only admins can modify scores!", show_alert=True)
+        await acknowledge(query, "score_back", started, "⚠️ Only admins can modify scores!", show_alert=True)
         return
     
-    await query.answer()
-    
-    try:
-        chat_id = query.message.chat_id
-        
-        # Update the message to show scoreboard including recent change lines
-        change_lines = list(SCORE_CHANGE_LOGS.get(chat_id, []))
-        if change_lines:
-            message_text = "\n".join(change_lines) + "\n\n🏆 **Scoreboard:**"
-        else:
-            message_text = "🏆 **Scoreboard:**"
+    chat_id = query.message.chat_id
 
-        await query.edit_message_text(
-            message_text,
-            reply_markup=scoreboard_keyboard(chat_id),
-            parse_mode="Markdown",
-        )
-        # Track this message as the latest scoreboard for the chat
-        try:
-            SCOREBOARD_MESSAGES[chat_id] = query.message.message_id
-        except Exception:
-            SCOREBOARD_MESSAGES[chat_id] = None
-        logger.debug(f"Returned to scoreboard for chat {chat_id}")
-    except Exception as e:
-        logger.error(f"Error in score_back handler: {e}")
-        await query.answer(f"Error returning to scoreboard: {e}", show_alert=True)
+    # Update the message to show scoreboard including recent change lines
+    change_lines = list(SCORE_CHANGE_LOGS.get(chat_id, []))
+    if change_lines:
+        message_text = "\n".join(change_lines) + "\n\n🏆 **Scoreboard:**"
+    else:
+        message_text = "🏆 **Scoreboard:**"
+
+    # Track this message as the latest scoreboard for the chat
+    SCOREBOARD_MESSAGES[chat_id] = query.message.message_id
+
+    await acknowledge(query, "score_back", started)
+
+    defer(context, update, "score_back", started, edit_message(
+        context.bot,
+        chat_id=chat_id,
+        message_id=query.message.message_id,
+        text=message_text,
+        reply_markup=scoreboard_keyboard(chat_id),
+        parse_mode="Markdown",
+    ))
+    logger.debug(f"Returned to scoreboard for chat {chat_id}")
 
 
 async def finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Finish game: send a final scoreboard message (admin only)"""
+    started = time.perf_counter()
     query = update.callback_query
-    await query.answer()
     user_id = query.from_user.id
 
     if user_id not in ADMIN_IDS:
         logger.warning(f"Unauthorized finish attempt by user {user_id}")
-        await query.answer("⚠️ Only admins can finish the game!", show_alert=True)
+        await acknowledge(query, "finish", started, "⚠️ Only admins can finish the game!", show_alert=True)
         return
 
     chat_id = query.message.chat_id
 
     # Build final scoreboard
-    scores = SCORES.get(chat_id, {})
+    scores = chat_scores(chat_id)
     items = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
 
     lines = ["🏁 **Final Scoreboard:**"]
@@ -723,35 +1518,118 @@ async def finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         lines.append("No scores yet.")
 
+    await acknowledge(query, "finish", started)
+
     # Send final scoreboard as a new message
-    try:
+    async def send_final_scoreboard():
         await context.bot.send_message(
             chat_id=chat_id,
             text="\n".join(lines),
             parse_mode="Markdown",
         )
         logger.info(f"Final scoreboard sent in chat {chat_id} by admin {user_id}")
-    except Exception as e:
-        logger.error(f"Failed to send final scoreboard in chat {chat_id}: {e}")
-        await query.answer("Error sending final scoreboard", show_alert=True)
+
+    defer(context, update, "finish", started, send_final_scoreboard())
+
+# -------------------- LEADERBOARD COMMAND --------------------
+async def show_leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Send this chat's and the global leaderboards"""
+    chat_id = update.effective_chat.id
+
+    lines = []
+    for header, scope in ((LEADERBOARD_CHAT_HEADER, chat_id), (LEADERBOARD_GLOBAL_HEADER, GLOBAL_SCOPE)):
+        lines.append(header)
+        for board in LEADERBOARD_BOARDS:
+            lines.append(LEADERBOARD_BOARD_TITLES[board])
+            top = board_top(leaderboard(scope, board), LEADERBOARD_SHOWN)
+            if not top:
+                lines.append(LEADERBOARD_EMPTY)
+            for i, (uid, value) in enumerate(top, start=1):
+                name = USER_NAMES.get(uid, f"User {uid}")
+                lines.append(LEADERBOARD_BOARD_ENTRY.format(position=i, name=name, value=value))
+        lines.append("")
+
+    await update.message.reply_text(
+        "\n".join(lines).strip(),
+        parse_mode="Markdown",
+    )
+    logger.debug(f"Sent leaderboards to chat {chat_id}")
+
+# -------------------- POLLING --------------------
+# The long-poll timeout follows activity. While games are running polls are
+# kept short, so a dead connection is noticed quickly. When nothing happens the
+# timeout doubles on every empty poll up to POLL_TIMEOUT_IDLE, so an idle bot
+# makes few requests. The first poll after startup is bounded by
+# POLL_TIMEOUT_FIRST.
+
+# adaptive long-poll state
+POLL_STATE = {
+    "first": True,
+    "timeout": POLL_TIMEOUT_ACTIVE,
+    "last_activity": 0.0,
+}
+
+def next_poll_timeout():
+    """Long-poll timeout for the next getUpdates"""
+    if POLL_STATE["first"]:
+        return POLL_TIMEOUT_FIRST
+    if time.monotonic() - POLL_STATE["last_activity"] < POLL_ACTIVE_WINDOW:
+        return POLL_TIMEOUT_ACTIVE
+    return POLL_STATE["timeout"]
+
+def note_poll(update_count):
+    """Adapt the long-poll timeout to the result of a getUpdates"""
+    POLL_STATE["first"] = False
+    if update_count:
+        POLL_STATE["last_activity"] = time.monotonic()
+        POLL_STATE["timeout"] = POLL_TIMEOUT_ACTIVE
+    elif time.monotonic() - POLL_STATE["last_activity"] >= POLL_ACTIVE_WINDOW:
+        POLL_STATE["timeout"] = min(POLL_TIMEOUT_IDLE, POLL_STATE["timeout"] * 2)
+
+class AdaptivePollingBot(ExtBot):
+    """ExtBot whose polling getUpdates uses the adaptive long-poll timeout"""
+
+    async def get_updates(self, offset=None, limit=None, timeout=None, allowed_updates=None, **kwargs):
+        # Calls with an explicit zero timeout (e.g. the updater's shutdown
+        # cleanup) are not polls and keep it
+        if not timeout:
+            return await super().get_updates(offset, limit, timeout, allowed_updates, **kwargs)
+
+        timeout = next_poll_timeout()
+        updates = await super().get_updates(offset, limit, timeout, allowed_updates, **kwargs)
+        note_poll(len(updates))
+        return updates
 
 # -------------------- MAIN --------------------
 def main():
     logger.info("Starting buzzingaTgBot...")
-    app = ApplicationBuilder().token(BOT_TOKEN).job_queue(JobQueue()).build()
+    load_pinned_buzzers()
+    load_score_ledgers()
+    bot = AdaptivePollingBot(token=BOT_TOKEN)
+    app = ApplicationBuilder().bot(bot).job_queue(JobQueue()).build()
 
+    app.add_handler(TypeHandler(Update, admission_gate), group=-1)
     app.add_handler(CommandHandler(["start", "buzz"], start))
+    app.add_handler(CommandHandler("leaderboard", show_leaderboard))
     app.add_handler(CallbackQueryHandler(buzz, pattern="^buzz$"))
     app.add_handler(CallbackQueryHandler(lock, pattern="^lock$"))
     app.add_handler(CallbackQueryHandler(unlock, pattern="^unlock$"))
     app.add_handler(CallbackQueryHandler(reset, pattern="^reset$"))
     app.add_handler(CallbackQueryHandler(score_user, pattern="^score_user_"))
     app.add_handler(CallbackQueryHandler(score_points, pattern="^score_points_"))
+    app.add_handler(CallbackQueryHandler(score_undo, pattern="^score_undo$"))
     app.add_handler(CallbackQueryHandler(score_back, pattern="^score_back$"))
     app.add_handler(CallbackQueryHandler(finish, pattern="^finish$"))
 
+    app.job_queue.run_repeating(log_metrics, METRICS_LOG_INTERVAL, first=METRICS_LOG_INTERVAL)
+    app.job_queue.run_repeating(sweep_rate_limits, RATE_LIMIT_SWEEP_INTERVAL, first=RATE_LIMIT_SWEEP_INTERVAL)
+
     logger.info("Bot started and polling for updates")
-    app.run_polling(drop_pending_updates=True)
+    app.run_polling(
+        drop_pending_updates=True,
+        allowed_updates=ALLOWED_UPDATES,
+        timeout=POLL_TIMEOUT_ACTIVE,
+    )
 
 if __name__ == "__main__":
     main()
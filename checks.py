@@ -0,0 +1,221 @@
+"""
+Behaviour checks for buzzingaTgBot.
+
+Exercises the leaderboard top lists against a brute-force sort, the tap
+admission gate, the score ledger (undo, compaction, replay) and a few
+handler sequences, using the soak test's fakes and a VirtualClock. Fails on
+the first check that doesn't hold.
+
+Usage:
+    python checks.py [--ops 200000] [--seed 1]
+"""
+import os
+
+os.environ.setdefault("BOT_TOKEN", "0:checks")
+os.environ.setdefault("ADMIN_IDS", "1")
+
+import argparse
+import asyncio
+import logging
+import random
+import sys
+from types import SimpleNamespace
+
+import buzzingaTgBot as bot
+from soak import ADMIN_ID, FakeApplication, FakeBot, callback_update, command_update, user
+
+
+# -------------------- LEADERBOARDS --------------------
+def check_leaderboards(ops, rng):
+    """board_set/board_add keep the top list equal to a full sort"""
+    cases = [
+        # (users, ops, change) - small boards, boards larger than the reserve,
+        # point swings and arbitrary values
+        (5, ops // 100, lambda: rng.choice([100, -100, 300])),
+        (40, ops // 10, lambda: rng.choice([100, 200, -100, -100, 300, -200])),
+        (2000, ops, lambda: rng.choice([100, 200, -100, -100, 300, -200])),
+        (2000, ops // 2, None),
+    ]
+    for case_no, (users, count, change) in enumerate(cases):
+        lb = bot.leaderboard(("check", case_no), "points")
+        for i in range(count):
+            uid = rng.randrange(users)
+            if change:
+                bot.board_add(lb, uid, change())
+            else:
+                bot.board_set(lb, uid, rng.randrange(50))
+            if i % 10:
+                continue
+            # the list is always exactly the best players, never over its bound
+            ranked = sorted((-v, uid) for uid, v in lb["values"].items())
+            top = lb["top"]
+            assert len(top) <= bot.LEADERBOARD_SIZE + bot.LEADERBOARD_RESERVE, f"case {case_no}, op {i}: top list overgrew"
+            assert top == ranked[:len(top)], f"case {case_no}, op {i}: top list is not a prefix of the ranking"
+            for n in (3, bot.LEADERBOARD_SHOWN, bot.LEADERBOARD_SIZE):
+                expected = [(uid, -neg) for neg, uid in ranked[:n]]
+                got = bot.board_top(lb, n)
+                assert got == expected, f"case {case_no}, op {i}: {got} != {expected}"
+
+
+# -------------------- ADMISSION --------------------
+def check_admit():
+    """Burst, shed, throttle and refill of one token bucket"""
+    uid = 9001
+    now = 1000.0
+    for _ in range(bot.BUZZ_BURST):
+        assert bot.admit(uid, now) == "admitted", "a tap within the burst was not admitted"
+    for _ in range(bot.THROTTLE_STRIKES - 1):
+        assert bot.admit(uid, now) == "shed", "a tap over the burst was not shed"
+    assert bot.admit(uid, now) == "throttle", "the last strike didn't throttle the user"
+    assert bot.admit(uid, now + bot.THROTTLE_DURATION - 1) == "throttled", "the throttle ended early"
+
+    # Served the throttle; the bucket refilled in the meantime
+    later = now + bot.THROTTLE_DURATION
+    for _ in range(bot.BUZZ_BURST):
+        assert bot.admit(uid, later) == "admitted", "the bucket didn't refill during the throttle"
+    assert bot.admit(uid, later) == "shed", "the refilled bucket holds more than the burst"
+    assert bot.admit(uid, later + bot.BUZZ_COOLDOWN * 1.5) == "admitted", "a token didn't refill after the cooldown"
+
+
+async def passes_gate(update, context):
+    try:
+        await bot.admission_gate(update, context)
+    except bot.ApplicationHandlerStop:
+        return False
+    return True
+
+
+async def check_admission_gate(context):
+    """Only BUZZ taps use up the tap budget"""
+    chat_id, player = 9100, user(9101)
+    for _ in range(bot.BUZZ_BURST + bot.THROTTLE_STRIKES + 5):
+        assert await passes_gate(command_update(context.bot, chat_id, player), context), "a chat message was shed"
+        assert await passes_gate(callback_update(context.bot, chat_id, 1, player, "score_back"), context), "a scoreboard tap was shed"
+    assert player.id not in bot.RATE_LIMITS, "messages and other buttons were charged to the tap budget"
+
+    tap = callback_update(context.bot, chat_id, 1, player, "buzz")
+    for _ in range(bot.BUZZ_BURST):
+        assert await passes_gate(tap, context), "a tap within the burst was shed"
+    assert not await passes_gate(tap, context), "a tap over the burst was admitted"
+
+    admin_tap = callback_update(context.bot, chat_id, 1, user(ADMIN_ID), "buzz")
+    for _ in range(bot.BUZZ_BURST * 4):
+        assert await passes_gate(admin_tap, context), "an admin tap was shed"
+
+
+# -------------------- SCORE LEDGER --------------------
+def check_ledger(rng):
+    """Undo appends inverses, compaction keeps the undo window, replay matches"""
+    chat_id = 9200
+    bot.register_player(chat_id, 1)
+    assert bot.chat_scores(chat_id) == {1: 0}, "a registered player is missing from the scoreboard"
+    assert bot.score_ledger(chat_id)["snapshot"] == {}, "registering a player changed the snapshot"
+
+    expected = {1: 0}
+    for _ in range(bot.LEDGER_SNAPSHOT_EVERY * 3 + 7):
+        uid, delta = rng.randrange(2, 6), rng.choice([100, -100, 300])
+        bot.record_score(chat_id, ADMIN_ID, uid, delta)
+        expected[uid] = expected.get(uid, 0) + delta
+        ledger = bot.score_ledger(chat_id)
+        assert len(ledger["entries"]) <= bot.LEDGER_SNAPSHOT_EVERY, "the ledger tail was not compacted"
+        assert bot.chat_scores(chat_id) == expected, "cached totals drifted from the score changes"
+    assert len(ledger["entries"]) >= bot.LEDGER_UNDO_DEPTH, "compaction cut into the undo window"
+
+    # Undo walks back through the undo window, newest first, and stops there
+    undone = []
+    while (entry := bot.last_undoable(ledger)) is not None:
+        seq, _, uid, delta, _, undoes = entry
+        assert undoes is None and seq not in undone, f"entry {seq} can't be undone"
+        assert not undone or seq < undone[-1], f"undo skipped ahead to entry {seq}"
+        bot.record_score(chat_id, ADMIN_ID, uid, -delta, undoes=seq)
+        expected[uid] -= delta
+        undone.append(seq)
+        assert bot.chat_scores(chat_id) == expected, f"undoing entry {seq} left the wrong totals"
+    assert len(undone) >= bot.LEDGER_UNDO_DEPTH // 2, "fewer changes could be undone than the undo window holds"
+
+    # Recovery: totals rebuilt from the snapshot and tail match the cache
+    bot.SCORES.pop(chat_id)
+    assert bot.chat_scores(chat_id) == expected, "replaying the ledger gave different totals"
+
+
+# -------------------- HANDLERS --------------------
+async def check_unlock_counts_next_round(context):
+    """A round after lock + unlock still credits its fastest player"""
+    chat_id, admin = 9300, user(ADMIN_ID)
+    await bot.start(command_update(context.bot, chat_id, admin), context)
+    msg_id = bot.NEWEST_BUZZER[chat_id]
+
+    def tap(who, data):
+        return callback_update(context.bot, chat_id, msg_id, who, data)
+
+    await bot.buzz(tap(user(9310), "buzz"), context)
+    await bot.lock(tap(admin, "lock"), context)
+    await bot.unlock(tap(admin, "unlock"), context)
+    await bot.buzz(tap(user(9320), "buzz"), context)
+    await bot.lock(tap(admin, "lock"), context)
+    await context.application.drain()
+    await bot.CLOCK.advance(bot.AUTO_RESET_DELAY)
+    await context.application.drain()
+
+    assert bot.fastest_count(chat_id, 9320) == 1, "the round after an unlock didn't credit its fastest player"
+    assert bot.session_stats(chat_id)["rounds"] == 2, "lock and auto-reset counted a round twice"
+
+
+async def check_expired_buzzers(context):
+    """Superseded buzzers stay expired; a chat with none on record adopts the tapped one"""
+    chat_id, admin = 9400, user(ADMIN_ID)
+
+    # Restart with no pinned buzzer saved: the live game still works
+    await bot.buzz(callback_update(context.bot, chat_id, 70, user(9401), "buzz"), context)
+    assert (chat_id, 70) in bot.STATE and (chat_id, 70) in bot.SCHEDULED_RESETS, "the live buzzer was not adopted after a restart"
+    await bot.CLOCK.advance(bot.AUTO_RESET_DELAY)
+    await context.application.drain()
+
+    await bot.start(command_update(context.bot, chat_id, admin), context)
+    await bot.buzz(callback_update(context.bot, chat_id, 70, user(9401), "buzz"), context)
+    assert (chat_id, 70) not in bot.STATE and (chat_id, 70) not in bot.RENDERED, "a tap revived a superseded buzzer"
+
+    # Another chat's buzzer with the same message id is untouched
+    other = 9500
+    await bot.buzz(callback_update(context.bot, other, 70, user(9501), "buzz"), context)
+    await bot.start(command_update(context.bot, chat_id, admin), context)
+    assert (other, 70) in bot.STATE, "/start evicted another chat's buzzer with the same message id"
+
+
+async def check_handlers():
+    context = SimpleNamespace(bot=FakeBot(), application=FakeApplication())
+    await check_admission_gate(context)
+    await check_unlock_counts_next_round(context)
+    await check_expired_buzzers(context)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Behaviour checks for buzzingaTgBot")
+    parser.add_argument("--ops", type=int, default=200_000, help="leaderboard updates on the largest board")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    bot.save_pinned_buzzers = lambda: None
+    bot.save_score_ledger = lambda chat_id: None
+    bot.CLOCK = bot.VirtualClock()
+    rng = random.Random(args.seed)
+
+    checks = [
+        ("leaderboards", lambda: check_leaderboards(args.ops, rng)),
+        ("admit", check_admit),
+        ("ledger", lambda: check_ledger(rng)),
+        ("handlers", lambda: asyncio.run(check_handlers())),
+    ]
+    for name, check in checks:
+        try:
+            check()
+        except AssertionError as e:
+            print(f"FAIL: {name}: {e}")
+            sys.exit(1)
+        print(f"{name}: ok")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
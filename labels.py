@@ -89,6 +89,17 @@ BUZZ_FORMAT = "{position}. {name} (+{delta}s){suffix}"
 # Leaderboard entry format
 LEADERBOARD_ENTRY = "{position}. {name} — {count} fastest"
 
+# /leaderboard command
+LEADERBOARD_CHAT_HEADER = "🏆 **Leaderboard: this chat**"
+LEADERBOARD_GLOBAL_HEADER = "🌍 **Leaderboard: all chats**"
+LEADERBOARD_BOARD_TITLES = {
+    "fastest": "⚡ _Fastest finger_",
+    "streak": "🔥 _Best streak_",
+    "points": "💰 _Points_",
+}
+LEADERBOARD_BOARD_ENTRY = "{position}. {name} — {value}"
+LEADERBOARD_EMPTY = "No entries yet"
+
 # Error messages
 ERROR_UNPIN = "Unpin failed: {error}"
 ERROR_PIN = "Pin failed: {error}"
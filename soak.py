@@ -0,0 +1,327 @@
+"""
+Memory soak test for buzzingaTgBot.
+
+Drives simulated rounds across many chats through the admission gate and the
+real handlers, using a fake bot and a VirtualClock that fast-forwards through
+buzz gaps and auto-resets, and fails when the memory retained per round
+exceeds a budget.
+
+Usage:
+    python soak.py [--rounds 100000] [--chats 2000] [--players 4] [--budget 16]
+
+The defaults play 220,000 rounds including warm-up, 12-20 minutes under
+tracemalloc; --rounds 20000 --chats 500 is a 3-5 minute check.
+"""
+import os
+
+os.environ.setdefault("BOT_TOKEN", "0:soak")
+os.environ.setdefault("ADMIN_IDS", "1")
+
+import argparse
+import asyncio
+import gc
+import itertools
+import logging
+import sys
+import tracemalloc
+from types import SimpleNamespace
+
+import buzzingaTgBot as bot
+
+ADMIN_ID = next(iter(bot.ADMIN_IDS))
+
+# the module-level globals the soak watches
+WATCHED = (
+    "STATE",
+    "SCHEDULED_RESETS",
+    "USER_NAMES",
+    "SCORES",
+    "SCORE_LEDGERS",
+    "SCORE_PLAYERS",
+    "SCORE_CHANGE_LOGS",
+    "SCOREBOARD_MESSAGES",
+    "SESSION_STATS",
+    "LEADERBOARDS",
+    "PINNED_BUZZER",
+    "NEWEST_BUZZER",
+    "PENDING_RENDERS",
+    "RATE_LIMITS",
+    "RENDERED",
+    "EDIT_LOCKS",
+)
+
+# new game (/start) every this many rounds in a chat
+ROUNDS_PER_GAME = 10
+
+# virtual seconds between two players' buzzes; later buzzers land outside
+# the photo-finish threshold
+BUZZ_GAP = 0.4
+
+# games each chat plays before the first snapshot; long enough for every
+# chat's score ledger to have compacted at least once
+WARMUP_GAMES = 6
+
+
+# chat_id -> the buzzer the chat's last /start replaced
+SUPERSEDED_BUZZERS = {}
+
+
+# -------------------- FAKES --------------------
+class FakeBot:
+    """Stands in for telegram.Bot; every call succeeds instantly"""
+
+    def __init__(self):
+        # like Telegram, message ids count up per chat, so chats share ids
+        self.message_ids = {}
+        self.calls = 0
+
+    def next_message_id(self, chat_id):
+        if chat_id not in self.message_ids:
+            self.message_ids[chat_id] = itertools.count(1)
+        return next(self.message_ids[chat_id])
+
+    async def send_message(self, chat_id, text, reply_markup=None, parse_mode=None):
+        self.calls += 1
+        return FakeMessage(self, chat_id, self.next_message_id(chat_id))
+
+    async def edit_message_text(self, chat_id, message_id, text, reply_markup=None, parse_mode=None):
+        self.calls += 1
+
+    async def pin_chat_message(self, chat_id, message_id, disable_notification=None):
+        self.calls += 1
+
+    async def unpin_chat_message(self, chat_id, message_id=None):
+        self.calls += 1
+
+
+class FakeMessage:
+    def __init__(self, fake_bot, chat_id, message_id):
+        self._bot = fake_bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+
+    async def reply_text(self, text, reply_markup=None, parse_mode=None):
+        return await self._bot.send_message(self.chat_id, text, reply_markup, parse_mode)
+
+
+class FakeQuery:
+    def __init__(self, message, user, data):
+        self.message = message
+        self.from_user = user
+        self.data = data
+
+    async def answer(self, text=None, show_alert=False):
+        pass
+
+
+class FakeApplication:
+    """Runs deferred handler work as plain asyncio tasks"""
+
+    def __init__(self):
+        self.tasks = set()
+
+    def create_task(self, coro, update=None):
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def drain(self):
+        while self.tasks:
+            await asyncio.gather(*list(self.tasks))
+
+
+# -------------------- SIMULATION --------------------
+def user(user_id):
+    return SimpleNamespace(id=user_id, full_name=f"Player {user_id}")
+
+
+def command_update(fake_bot, chat_id, from_user):
+    message = FakeMessage(fake_bot, chat_id, fake_bot.next_message_id(chat_id))
+    return SimpleNamespace(
+        message=message,
+        callback_query=None,
+        effective_user=from_user,
+        effective_chat=SimpleNamespace(id=chat_id),
+    )
+
+
+def callback_update(fake_bot, chat_id, message_id, from_user, data):
+    message = FakeMessage(fake_bot, chat_id, message_id)
+    return SimpleNamespace(
+        callback_query=FakeQuery(message, from_user, data),
+        effective_user=from_user,
+        effective_chat=SimpleNamespace(id=chat_id),
+    )
+
+
+async def deliver(handler, update, context):
+    """Run an update through the admission gate, then its handler"""
+    try:
+        await bot.admission_gate(update, context)
+    except bot.ApplicationHandlerStop:
+        return
+    await handler(update, context)
+
+
+async def play_round(context, chat_id, round_no, players):
+    """One full round: buzzes, an occasional lock, auto-reset and scoring"""
+    fake_bot = context.bot
+    admin = user(ADMIN_ID)
+
+    first_player = chat_id * 1000
+
+    if round_no % ROUNDS_PER_GAME == 0:
+        previous = bot.NEWEST_BUZZER.get(chat_id)
+        await deliver(bot.start, command_update(fake_bot, chat_id, admin), context)
+        if previous is not None and previous != bot.NEWEST_BUZZER[chat_id]:
+            SUPERSEDED_BUZZERS[chat_id] = previous
+
+    if round_no == 0:
+        # Spread chats over the ledger compaction cycle so their tails don't
+        # all grow and compact in the same rounds
+        cycle = bot.LEDGER_SNAPSHOT_EVERY - bot.LEDGER_UNDO_DEPTH + 1
+        for _ in range(bot.LEDGER_UNDO_DEPTH + chat_id % cycle):
+            bot.record_score(chat_id, ADMIN_ID, first_player, 0)
+
+    # Players keep tapping the last game's buzzer; it has been evicted and
+    # must stay that way
+    old_buzzer_id = SUPERSEDED_BUZZERS.get(chat_id)
+    if old_buzzer_id is not None:
+        await deliver(bot.buzz, callback_update(fake_bot, chat_id, old_buzzer_id, user(first_player), "buzz"), context)
+
+    buzzer_id = bot.NEWEST_BUZZER[chat_id]
+    for player_id in range(first_player, first_player + players):
+        await deliver(bot.buzz, callback_update(fake_bot, chat_id, buzzer_id, user(player_id), "buzz"), context)
+        await bot.CLOCK.advance(BUZZ_GAP)
+
+    if round_no % 3 == 0:
+        await deliver(bot.lock, callback_update(fake_bot, chat_id, buzzer_id, admin, "lock"), context)
+
+    # Fast-forward to the auto-reset
+    await context.application.drain()
+    await bot.CLOCK.advance(bot.AUTO_RESET_DELAY)
+
+    scoreboard_id = bot.SCOREBOARD_MESSAGES.get(chat_id)
+    if scoreboard_id and round_no % 2 == 0:
+        winner = first_player + round_no % players
+        await deliver(
+            bot.score_points,
+            callback_update(fake_bot, chat_id, scoreboard_id, admin, f"score_points_{winner}_100"),
+            context,
+        )
+        if round_no % 4 == 0:
+            await deliver(
+                bot.score_undo,
+                callback_update(fake_bot, chat_id, scoreboard_id, admin, "score_undo"),
+                context,
+            )
+        await deliver(
+            bot.score_back,
+            callback_update(fake_bot, chat_id, scoreboard_id, admin, "score_back"),
+            context,
+        )
+
+    if round_no % ROUNDS_PER_GAME == ROUNDS_PER_GAME - 1:
+        await deliver(bot.finish, callback_update(fake_bot, chat_id, buzzer_id, admin, "finish"), context)
+        await deliver(bot.show_leaderboard, command_update(fake_bot, chat_id, user(first_player)), context)
+
+    await context.application.drain()
+
+
+async def run_rounds(context, first, count, chats, players):
+    for n in range(first, first + count):
+        if n % chats == 0:
+            await bot.sweep_rate_limits(context)
+        await play_round(context, n % chats + 1, n // chats, players)
+
+
+def global_sizes():
+    return {name: len(getattr(bot, name)) for name in WATCHED}
+
+
+def retained(before, after):
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ]
+    after = after.filter_traces(filters)
+    before = before.filter_traces(filters)
+    return after.compare_to(before, "lineno")
+
+
+async def soak(rounds, chats, players, budget, top, frames, warmup_games):
+    context = SimpleNamespace(
+        bot=FakeBot(),
+        application=FakeApplication(),
+    )
+
+    # Trace from the start: entries allocated untraced and replaced later
+    # would look like growth. The warm-up brings every per-chat and per-user
+    # structure to its steady size before the first snapshot.
+    tracemalloc.start(frames)
+    warmup = chats * ROUNDS_PER_GAME * warmup_games
+    await run_rounds(context, 0, warmup, chats, players)
+
+    gc.collect()
+    sizes_before = global_sizes()
+    before = tracemalloc.take_snapshot()
+
+    await run_rounds(context, warmup, rounds, chats, players)
+
+    gc.collect()
+    sizes_after = global_sizes()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = retained(before, after)
+    growth = sum(stat.size_diff for stat in stats)
+    per_round = growth / rounds
+
+    print(f"Rounds: {rounds} across {chats} chats ({players} players each), bot calls: {context.bot.calls}")
+    print(f"Virtual time: {bot.CLOCK.now() / 3600:.1f} h, admission: {bot.ADMISSION_STATS}")
+    print(f"Edits: {bot.EDIT_STATS}")
+    print(f"Retained: {growth / 1024:.1f} KiB total, {per_round:.1f} B/round (budget {budget} B/round)")
+    print("Global sizes (before -> after):")
+    for name in WATCHED:
+        print(f"  {name}: {sizes_before[name]} -> {sizes_after[name]}")
+    print(f"Top {top} allocation sites by growth:")
+    for stat in stats[:top]:
+        print(f"  {stat}")
+
+    return per_round <= budget
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory soak test for buzzingaTgBot")
+    parser.add_argument("--rounds", type=int, default=100_000, help="measured rounds")
+    parser.add_argument("--chats", type=int, default=2000, help="simulated chats")
+    parser.add_argument("--players", type=int, default=4, help="players per chat")
+    parser.add_argument("--budget", type=float, default=16, help="retained bytes allowed per round")
+    parser.add_argument("--top", type=int, default=10, help="allocation sites to report")
+    parser.add_argument("--warmup-games", type=int, default=WARMUP_GAMES, help="games per chat before measuring")
+    parser.add_argument("--reuse-pinned", action="store_true", help="run with REUSE_PINNED_BUZZER on")
+    parser.add_argument("--frames", type=int, default=1, help="traceback frames kept per allocation")
+    args = parser.parse_args()
+
+    # Per-buzz INFO logs would dominate the run and flood buzzinga_bot.log
+    logging.disable(logging.CRITICAL)
+
+    # Saving pins and score ledgers to disk is not what the soak measures, and
+    # thousands of games would rewrite the real files
+    bot.save_pinned_buzzers = lambda: None
+    bot.save_score_ledger = lambda chat_id: None
+    bot.REUSE_PINNED_BUZZER = args.reuse_pinned
+    bot.CLOCK = bot.VirtualClock()
+
+    ok = asyncio.run(soak(args.rounds, args.chats, args.players, args.budget, args.top, args.frames, args.warmup_games))
+
+    if not ok:
+        print("FAIL: retained memory per round is over budget")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()